@@ -0,0 +1,90 @@
+"""
+Benchmark del parser de feeds: feedparser vs. streaming lxml (bot.stream_parse_feed).
+
+Uso:
+    python bench_parse.py --capture          # descarga El Tiempo, Semana y Google News a bench_feeds/
+    python bench_parse.py                    # compara tiempo y memoria pico sobre los feeds capturados
+    python bench_parse.py --dir otra/carpeta --repeat 50 --limit 15
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+# bot.py exige secrets al importar; para el benchmark basta con valores de relleno
+os.environ.setdefault("TELEGRAM_TOKEN", "bench")
+for _k in ("CHAT_ID_ANTIOQUIA", "CHAT_ID_CALDAS", "CHAT_ID_GUAJIRA", "CHAT_ID_CESAR"):
+    os.environ.setdefault(_k, "0")
+
+import requests
+import feedparser
+
+import bot
+
+CAPTURE_FEEDS = {
+    "eltiempo_politica.xml": bot.NEWS_FEEDS[0],
+    "eltiempo_gobierno.xml": bot.NEWS_FEEDS[1],
+    "semana_politica.xml": bot.NEWS_FEEDS[3],
+    "gnews_guajira_salud.xml": bot.google_news_rss_url('site:x.com "la guajira" "salud"'),
+    "gnews_antioquia_corrupcion.xml": bot.google_news_rss_url('"antioquia" "corrupción"'),
+}
+
+
+def capture(out_dir: str) -> None:
+    os.makedirs(out_dir, exist_ok=True)
+    headers = {"User-Agent": "Mozilla/5.0 (PulsoElectoral/1.0)"}
+    for name, url in CAPTURE_FEEDS.items():
+        r = requests.get(url, headers=headers, timeout=30)
+        r.raise_for_status()
+        with open(os.path.join(out_dir, name), "wb") as f:
+            f.write(r.content)
+        print(f"capturado {name}: {len(r.content)} bytes")
+
+
+def measure(fn, content: bytes, repeat: int):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        n = len(fn(content))
+    elapsed = (time.perf_counter() - t0) / repeat
+
+    tracemalloc.start()
+    fn(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return n, elapsed, peak
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dir", default="bench_feeds")
+    ap.add_argument("--capture", action="store_true")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--limit", type=int, default=40)
+    args = ap.parse_args()
+
+    if args.capture:
+        capture(args.dir)
+
+    files = sorted(f for f in os.listdir(args.dir) if f.endswith(".xml")) if os.path.isdir(args.dir) else []
+    if not files:
+        print(f"Sin feeds en {args.dir}/ (usar --capture)")
+        return 1
+
+    parsers = {
+        "feedparser": lambda c: feedparser.parse(c).entries[:args.limit],
+        "lxml_stream": lambda c: bot.stream_parse_feed(c, limit=args.limit),
+    }
+
+    print(f"{'feed':<32} {'parser':<12} {'items':>5} {'ms/parse':>9} {'peak KiB':>9}")
+    for name in files:
+        with open(os.path.join(args.dir, name), "rb") as f:
+            content = f.read()
+        for pname, fn in parsers.items():
+            n, elapsed, peak = measure(fn, content, args.repeat)
+            print(f"{name:<32} {pname:<12} {n:>5} {elapsed * 1000:>9.2f} {peak / 1024:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,28 @@
 import os
 import re
 import json
+import math
+import calendar
 import time
+import io
+import queue
+import shutil
 import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timezone
-from typing import Dict, List, Tuple, Optional
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List, Tuple, Optional, Iterable
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 
 import requests
 import feedparser
 from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
 
 # pytrends (Google Trends)
 try:
@@ -28,9 +42,49 @@ CHAT_ID_GUAJIRA = os.getenv("CHAT_ID_GUAJIRA")
 CHAT_ID_CESAR = os.getenv("CHAT_ID_CESAR")
 CHAT_ID_PREMIUM = os.getenv("CHAT_ID_PREMIUM")  # opcional (monetizable / copy a clientes)
 
-MODE = os.getenv("MODE", "ALERT").strip().upper()  # ALERT | DAILY
+MODE = os.getenv("MODE", "ALERT").strip().upper()  # ALERT | DAILY | PUSH (servicio continuo)
 ENABLE_TRENDS = os.getenv("ENABLE_TRENDS", "1").strip() == "1"
 
+# heavy hitters (hashtags/keywords): top-k + cota de error del Count-Min Sketch
+HH_TOP_K = int(os.getenv("HH_TOP_K", "50"))
+HH_EPSILON = float(os.getenv("HH_EPSILON", "0.001"))  # error <= epsilon * total
+HH_DELTA = float(os.getenv("HH_DELTA", "0.01"))  # probabilidad de superar la cota
+
+# salud de fuentes: timeout adaptativo (p95), circuit breaker y request cubierto (hedge) opcional
+FETCH_TIMEOUT_MIN = float(os.getenv("FETCH_TIMEOUT_MIN", "4"))
+FETCH_TIMEOUT_MAX = float(os.getenv("FETCH_TIMEOUT_MAX", "25"))
+FETCH_TIMEOUT_FACTOR = float(os.getenv("FETCH_TIMEOUT_FACTOR", "2.0"))  # timeout = p95 * factor
+CB_FAIL_THRESHOLD = int(os.getenv("CB_FAIL_THRESHOLD", "3"))  # fallos seguidos para abrir
+CB_COOLDOWN = int(os.getenv("CB_COOLDOWN", "1800"))  # segundos antes de volver a probar
+ENABLE_HEDGE = os.getenv("ENABLE_HEDGE", "0").strip() == "1"
+
+# enriquecimiento con texto completo del artículo (opt-in)
+ENABLE_ENRICH = os.getenv("ENABLE_ENRICH", "0").strip() == "1"
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "6"))
+ENRICH_BYTE_BUDGET = int(os.getenv("ENRICH_BYTE_BUDGET", str(20 * 1024 * 1024)))  # bytes por corrida
+ENRICH_TIME_BUDGET = float(os.getenv("ENRICH_TIME_BUDGET", "60"))  # segundos por corrida
+ENRICH_MAX_ARTICLE_BYTES = int(os.getenv("ENRICH_MAX_ARTICLE_BYTES", str(2 * 1024 * 1024)))
+ENRICH_CACHE_MAX_BYTES = int(os.getenv("ENRICH_CACHE_MAX_BYTES", str(30 * 1024 * 1024)))
+
+# resolución de links de Google News (redirect -> URL canónica del medio)
+URL_RESOLVE_CONCURRENCY = int(os.getenv("URL_RESOLVE_CONCURRENCY", "8"))
+URL_RESOLVE_TIME_BUDGET = float(os.getenv("URL_RESOLVE_TIME_BUDGET", "20"))  # segundos por corrida
+URL_RESOLVE_MAX_PER_RUN = int(os.getenv("URL_RESOLVE_MAX_PER_RUN", "150"))
+URL_RESOLVE_CACHE_MAX = int(os.getenv("URL_RESOLVE_CACHE_MAX", "20000"))  # entradas (LRU)
+URL_RESOLVE_TTL = 90 * 24 * 3600  # resuelto: prácticamente permanente
+URL_RESOLVE_FAIL_TTL = 6 * 3600  # fallido: se reintenta más tarde
+URL_RESOLVE_DEFER_MAX = 24 * 3600  # ítem con redirect sin resolver: se pospone hasta esta antigüedad, luego se descarta
+
+# ingesta push (MODE=PUSH): POST /ingest y/o spool data/inbox/*.jsonl, con micro-batching
+PUSH_HOST = os.getenv("PUSH_HOST", "127.0.0.1")
+PUSH_PORT = int(os.getenv("PUSH_PORT", "8787"))  # 0 = solo spool
+PUSH_TOKEN = os.getenv("PUSH_TOKEN")  # opcional: Authorization: Bearer <token>
+PUSH_BATCH_SECONDS = float(os.getenv("PUSH_BATCH_SECONDS", "2"))
+PUSH_BATCH_MAX = int(os.getenv("PUSH_BATCH_MAX", "200"))
+PUSH_POLL_SECONDS = int(os.getenv("PUSH_POLL_SECONDS", "900"))  # polling RSS dentro del servicio (0 = no)
+PUSH_WINDOW_SECONDS = int(os.getenv("PUSH_WINDOW_SECONDS", "900"))  # ventana de snapshot si no hay polling
+PUSH_MAX_BODY = 2 * 1024 * 1024
+
 if not TELEGRAM_TOKEN:
     raise RuntimeError("Falta secret: TELEGRAM_TOKEN")
 
@@ -57,6 +111,19 @@ DATA_DIR = "data"
 SEEN_PATH = os.path.join(DATA_DIR, "seen.json")
 HIST_PATH = os.path.join(DATA_DIR, "history.json")
 LAST_ALERT_PATH = os.path.join(DATA_DIR, "last_alert.json")  # anti repetidos
+HEALTH_PATH = os.path.join(DATA_DIR, "source_health.json")  # latencias / errores por fuente
+FEED_MARKS_PATH = os.path.join(DATA_DIR, "feed_marks.json")  # high-water mark por feed
+CHECKPOINT_PATH = os.path.join(DATA_DIR, "checkpoint.json")  # etapa de la corrida en curso (reanudable)
+CHECKPOINT_TTL = 6 * 3600  # checkpoints más viejos se descartan
+CHECKPOINT_MAX_ATTEMPTS = 3  # evita reintentar para siempre una corrida que siempre falla
+SENT_LOG_PATH = os.path.join(DATA_DIR, "sent.log")  # envíos de la corrida en curso (append-only, JSONL)
+OUTBOX_RETRY_PATH = os.path.join(DATA_DIR, "outbox_retry.json")  # mensajes a suscriptores que fallaron
+OUTBOX_RETRY_TTL = 24 * 3600  # pasado este tiempo el mensaje pendiente ya no es útil
+SUBSCRIBERS_PATH = os.getenv("SUBSCRIBERS_PATH", os.path.join(DATA_DIR, "subscribers.json"))
+INBOX_DIR = os.path.join(DATA_DIR, "inbox")  # spool push: *.jsonl (escribir .tmp y renombrar)
+URL_CACHE_PATH = os.path.join(DATA_DIR, "url_resolve_cache.json")  # redirect -> URL canónica (LRU + TTL)
+ARTICLE_CACHE_DIR = os.path.join(DATA_DIR, "article_cache")  # texto extraído por URL canónica (LRU)
+ARTICLE_CACHE_INDEX = os.path.join(ARTICLE_CACHE_DIR, "index.json")
 
 MUN_CACHE_PATH = os.path.join(DATA_DIR, "municipios_cache.json")
 MUN_CACHE_TTL = 30 * 24 * 3600  # 30 días
@@ -162,13 +229,35 @@ def load_json(path: str, default):
     try:
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
-    except Exception:
+    except Exception as ex:
+        # no se pisa en silencio: queda una copia del archivo dañado para revisarlo
+        print(f"Estado ilegible en {path} ({type(ex).__name__}: {ex}); se usa el valor por defecto")
+        try:
+            shutil.copyfile(path, path + ".corrupt")
+        except OSError:
+            pass
         return default
 
 
+def atomic_write_text(path: str, text: str) -> None:
+    # escribe a un temporal en el mismo directorio y renombra: nunca queda un archivo a medias
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-", suffix="-" + os.path.basename(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
 def save_json(path: str, obj) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    atomic_write_text(path, json.dumps(obj, ensure_ascii=False, indent=2))
 
 
 def normalize(text: str) -> str:
@@ -180,7 +269,7 @@ def sha(text: str) -> str:
 
 
 def item_fingerprint(title: str, link: str) -> str:
-    base = (normalize(title) + "|" + (link or "").strip()).encode("utf-8")
+    base = (normalize(title) + "|" + canonical_url(link)).encode("utf-8")
     return hashlib.sha256(base).hexdigest()[:24]
 
 
@@ -189,9 +278,125 @@ def google_news_rss_url(query: str) -> str:
     return f"https://news.google.com/rss/search?q={q}&hl=es-419&gl=CO&ceid=CO:es-419"
 
 
-def fetch_entries(feed_url: str):
-    parsed = feedparser.parse(feed_url)
-    return parsed.entries if getattr(parsed, "entries", None) else []
+def fetch_entries(feed_url: str, health: Optional[dict] = None, limit: Optional[int] = None):
+    health = {} if health is None else health
+    # breaker / errores por feed; latencias por host (solo para estimar el timeout)
+    st = health.setdefault("sources", {}).setdefault(feed_url, {})
+    host_st = health.setdefault("hosts", {}).setdefault(host_key(feed_url), {})
+    reason = circuit_open_reason(st)
+    if reason:
+        health.setdefault("skipped", {})[feed_url] = reason
+        return []
+
+    timeout = adaptive_timeout(host_st)
+    t0 = time.time()
+    try:
+        content = fetch_feed_bytes(feed_url, timeout, hedge_after=source_p95(host_st) if ENABLE_HEDGE else None)
+        entries = parse_feed(content, limit)
+    except Exception as ex:
+        record_source_result(st, host_st, ok=False, latency=time.time() - t0, error=f"{type(ex).__name__}: {ex}")
+        return []
+
+    record_source_result(st, host_st, ok=True, latency=time.time() - t0)
+    return entries
+
+
+# =========================
+# PARSER RSS/Atom (streaming, lxml) con fallback a feedparser
+# =========================
+FEED_ROOTS = {"rss", "feed", "RDF"}
+FEED_ITEMS = {"item", "entry"}  # por nombre local: cubre RSS 1.0/2.0 y Atom con cualquier namespace
+
+
+def _local(tag) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def parse_feed_date(value: str):
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        dt = parsedate_to_datetime(value)  # RSS (RFC 822)
+    except Exception:
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))  # Atom (ISO 8601)
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.utctimetuple()
+
+
+def _entry_from_element(elem) -> SimpleNamespace:
+    fields = {"title": "", "link": "", "summary": "", "published": "", "updated": ""}
+    for child in elem:
+        name = _local(child.tag)
+        if name == "link":
+            # Atom: <link href rel="alternate">; RSS: texto
+            href = child.get("href")
+            if href and child.get("rel", "alternate") == "alternate" and not fields["link"]:
+                fields["link"] = href
+            elif not href and child.text:
+                fields["link"] = child.text.strip()
+        elif name == "title":
+            fields["title"] = "".join(child.itertext()).strip()
+        elif name in ("description", "summary") and not fields["summary"]:
+            fields["summary"] = "".join(child.itertext()).strip()
+        elif name in ("pubDate", "published", "date"):
+            fields["published"] = (child.text or "").strip()
+        elif name == "updated":
+            fields["updated"] = (child.text or "").strip()
+
+    return SimpleNamespace(
+        title=fields["title"],
+        link=fields["link"],
+        summary=fields["summary"],
+        published_parsed=parse_feed_date(fields["published"]),
+        updated_parsed=parse_feed_date(fields["updated"]),
+    )
+
+
+def stream_parse_feed(content: bytes, limit: Optional[int] = None) -> List[SimpleNamespace]:
+    entries: List[SimpleNamespace] = []
+    context = etree.iterparse(
+        io.BytesIO(content), events=("start", "end"),
+        resolve_entities=False, no_network=True, huge_tree=False,
+    )
+    root = None
+    for event, elem in context:
+        if root is None:
+            root = elem
+            if _local(elem.tag) not in FEED_ROOTS:
+                # XML válido pero no es un feed (p. ej. página XHTML de error/consentimiento)
+                raise ValueError(f"raíz inesperada: <{_local(elem.tag)}>")
+        if event != "end" or elem is root or _local(elem.tag) not in FEED_ITEMS:
+            continue
+        entries.append(_entry_from_element(elem))
+        # libera memoria: el elemento y los hermanos ya procesados
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+        if limit is not None and len(entries) >= limit:
+            break
+    del context
+    return entries
+
+
+def parse_feed(content: bytes, limit: Optional[int] = None) -> list:
+    try:
+        entries = stream_parse_feed(content, limit)
+        if entries:
+            return entries
+    except (etree.XMLSyntaxError, ValueError):
+        pass
+
+    # mal formado, raíz desconocida o sin items: feedparser decide (más lento, pero solo en este caso)
+    parsed = feedparser.parse(content)
+    entries = parsed.entries if getattr(parsed, "entries", None) else []
+    if not entries and (getattr(parsed, "bozo", False) or not parsed.get("version")):
+        raise ValueError(f"feed inválido: {getattr(parsed, 'bozo_exception', '') or 'sin formato de feed reconocible'}")
+    return entries[:limit] if limit is not None else entries
 
 
 def send_telegram(chat_id: str, text: str):
@@ -222,6 +427,18 @@ def classify_categories(text: str) -> List[str]:
     return matched
 
 
+def rank_categories(text: str) -> List[str]:
+    # para textos largos (cuerpo del artículo): palabra completa y orden por cantidad de menciones,
+    # así "todavía" no cuenta como "vía" y el tema dominante no queda fuera del corte [:3]
+    text_n = normalize(text)
+    hits = {}
+    for cat, terms in CATEGORIES.items():
+        n = sum(len(re.findall(rf"\b{re.escape(normalize(t))}\b", text_n)) for t in terms)
+        if n:
+            hits[cat] = n
+    return sorted(hits, key=lambda c: hits[c], reverse=True)
+
+
 def human_category(cat: str) -> str:
     return CATEGORY_LABELS.get(cat, cat)
 
@@ -230,6 +447,454 @@ def build_terms_for_trends() -> List[str]:
     return ["inundaciones", "sequía", "infraestructura vial", "salud", "educación"]
 
 
+# =========================
+# HIGH-WATER MARKS por feed
+# =========================
+FEED_MARK_TTL = 30 * 24 * 3600  # marcas sin actualizar se descartan
+
+
+def entry_epoch(e) -> Optional[float]:
+    st = getattr(e, "published_parsed", None) or getattr(e, "updated_parsed", None)
+    if not st:
+        return None
+    try:
+        return float(calendar.timegm(st))
+    except Exception:
+        return None
+
+
+def entry_fingerprint(e) -> str:
+    return item_fingerprint(getattr(e, "title", "") or "", getattr(e, "link", "") or "")
+
+
+def take_new_entries(entries: list, mark: Optional[dict]) -> list:
+    # corta en la primera entrada ya procesada (feed ordenado por fecha o, sin fechas, por la cabeza previa)
+    if not mark:
+        return entries
+
+    order = mark.get("order")
+    out = []
+    for e in entries:
+        if order == "date":
+            ts = entry_epoch(e)
+            if ts is not None and ts < float(mark.get("ts", 0)):
+                break
+        elif order == "fp" and entry_fingerprint(e) == mark.get("top_fp"):
+            break
+        out.append(e)
+    return out
+
+
+def update_feed_mark(marks: dict, feed_url: str, entries: list) -> None:
+    if not entries:
+        return
+
+    dates = [entry_epoch(e) for e in entries]
+    if all(d is not None for d in dates):
+        # fechas fiables: solo sirve como corte si el feed viene del más nuevo al más viejo
+        order = "date" if all(a >= b for a, b in zip(dates, dates[1:])) else "none"
+    else:
+        order = "fp"
+
+    marks[feed_url] = {
+        "order": order,
+        "ts": max(d for d in dates if d is not None) if order == "date" else None,
+        "top_fp": entry_fingerprint(entries[0]),
+        "updated": time.time(),
+    }
+
+
+def prune_feed_marks(marks: dict) -> dict:
+    cutoff = time.time() - FEED_MARK_TTL
+    return {k: v for k, v in marks.items() if float(v.get("updated", 0)) >= cutoff}
+
+
+# =========================
+# SALUD DE FUENTES (timeouts adaptativos + circuit breaker)
+# =========================
+HEALTH_WINDOW = 50  # últimas N muestras por fuente
+
+
+HEALTH_TTL = 30 * 24 * 3600  # feeds sin actividad se descartan del estado
+
+
+def host_key(feed_url: str) -> str:
+    # Google News comparte endpoint entre queries: la latencia se agrupa por host
+    return urlparse(feed_url).netloc.lower() or feed_url
+
+
+def source_p95(st: dict) -> Optional[float]:
+    lat = sorted(st.get("lat") or [])
+    if not lat:
+        return None
+    return lat[min(len(lat) - 1, int(math.ceil(0.95 * len(lat))) - 1)]
+
+
+def adaptive_timeout(st: dict) -> float:
+    p95 = source_p95(st)
+    if p95 is None:
+        return FETCH_TIMEOUT_MAX
+    return max(FETCH_TIMEOUT_MIN, min(FETCH_TIMEOUT_MAX, p95 * FETCH_TIMEOUT_FACTOR))
+
+
+def circuit_open_reason(st: dict) -> Optional[str]:
+    if int(st.get("fails", 0)) < CB_FAIL_THRESHOLD:
+        return None
+    open_until = float(st.get("open_until", 0))
+    if time.time() < open_until:
+        return f"circuito abierto ({st.get('fails')} fallos seguidos, último: {st.get('last_error', '?')})"
+    if st.get("probing"):
+        # ya hubo una prueba en esta corrida (half-open): no insistir
+        return "circuito semiabierto (prueba en curso)"
+    st["probing"] = True
+    return None
+
+
+def record_source_result(st: dict, host_st: dict, ok: bool, latency: float, error: str = "") -> None:
+    results = (st.get("results") or []) + [1 if ok else 0]
+    st["results"] = results[-HEALTH_WINDOW:]
+    st["error_rate"] = round(1.0 - sum(st["results"]) / len(st["results"]), 3)
+    st["ts"] = time.time()
+    st.pop("probing", None)
+
+    if ok:
+        host_st["lat"] = ((host_st.get("lat") or []) + [round(latency, 3)])[-HEALTH_WINDOW:]
+        host_st["p95"] = source_p95(host_st)
+        st["fails"] = 0
+        st.pop("open_until", None)
+        return
+
+    st["fails"] = int(st.get("fails", 0)) + 1
+    st["last_error"] = error[:200]
+    st["last_error_ts"] = time.time()
+    if st["fails"] >= CB_FAIL_THRESHOLD:
+        st["open_until"] = time.time() + CB_COOLDOWN
+
+
+def _get_feed_bytes(feed_url: str, timeout: float) -> bytes:
+    headers = {"User-Agent": "Mozilla/5.0 (PulsoElectoral/1.0)"}
+    r = requests.get(feed_url, headers=headers, timeout=timeout)
+    r.raise_for_status()
+    return r.content
+
+
+def fetch_feed_bytes(feed_url: str, timeout: float, hedge_after: Optional[float] = None) -> bytes:
+    if not hedge_after or hedge_after >= timeout:
+        return _get_feed_bytes(feed_url, timeout)
+
+    # hedge: si el primer request supera el p95, se lanza un duplicado y gana el primero en responder
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        futures = [pool.submit(_get_feed_bytes, feed_url, timeout)]
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done:
+            futures.append(pool.submit(_get_feed_bytes, feed_url, timeout - hedge_after))
+        errors = []
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is None:
+                    return f.result()
+                errors.append(f.exception())
+        raise errors[0]
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def report_source_health(health: dict) -> None:
+    skipped = health.pop("skipped", {})
+    health["last_run"] = {"ts": time.time(), "skipped": skipped}
+    cutoff = time.time() - HEALTH_TTL
+    health["sources"] = {k: v for k, v in health.get("sources", {}).items() if float(v.get("ts", 0)) >= cutoff}
+
+    for src, reason in skipped.items():
+        print(f"Fuente omitida: {src} — {reason}")
+    for src, st in sorted(health["sources"].items()):
+        if st.get("error_rate"):
+            host_p95 = (health.get("hosts", {}).get(host_key(src)) or {}).get("p95")
+            p95 = f"{host_p95:.2f}s" if host_p95 is not None else "n/d"
+            print(f"Fuente {src}: error_rate={st['error_rate']:.0%} p95_host={p95} fallos_seguidos={st.get('fails', 0)}")
+
+
+# =========================
+# ENRIQUECIMIENTO (artículo completo) + cache LRU en disco
+# =========================
+TRACKING_PARAMS = {"fbclid", "gclid", "ocid", "cmpid", "mc_cid", "mc_eid", "outputtype"}
+TRANSIENT_STATUS = {403, 408, 425, 429}  # bloqueos / rate limit: se reintenta en otra corrida, no se cachea
+CHARSET_RE = re.compile(r"charset=([\w-]+)", re.IGNORECASE)
+XML_DECL_RE = re.compile(r"^\s*<\?xml[^>]*\?>")
+BOILERPLATE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "figure"]
+
+
+def canonical_url(url: str) -> str:
+    u = urlparse((url or "").strip())
+    if not u.scheme or not u.netloc:
+        return (url or "").strip()
+    query = [
+        (k, v) for k, v in parse_qsl(u.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    path = u.path.rstrip("/") or "/"
+    return urlunparse((u.scheme.lower(), u.netloc.lower(), path, "", urlencode(sorted(query)), ""))
+
+
+def extract_main_text(html_bytes: bytes, encoding: str = "utf-8", max_chars: int = 20000) -> str:
+    try:
+        markup = html_bytes.decode(encoding, errors="replace")
+    except LookupError:
+        markup = html_bytes.decode("utf-8", errors="replace")
+    markup = XML_DECL_RE.sub("", markup, count=1)  # lxml rechaza str con declaración de encoding
+    try:
+        doc = lxml_html.fromstring(markup)
+    except Exception:
+        return ""
+
+    for bad in doc.xpath("//" + " | //".join(BOILERPLATE_TAGS)):
+        bad.drop_tree()
+
+    # contenedor con más texto en <p>: <article> si existe, si no el padre dominante
+    containers = doc.xpath("//article") or [p.getparent() for p in doc.xpath("//p") if p.getparent() is not None]
+    best, best_len = None, 0
+    for c in set(containers):
+        n = sum(len(p.text_content()) for p in c.xpath(".//p"))
+        if n > best_len:
+            best, best_len = c, n
+    if best is None:
+        return ""
+
+    paragraphs = [" ".join(p.text_content().split()) for p in best.xpath(".//p")]
+    text = "\n".join(p for p in paragraphs if len(p) >= 40)
+    return text[:max_chars]
+
+
+def article_cache_get(index: dict, key: str) -> Optional[str]:
+    meta = index["entries"].get(key)
+    if not meta:
+        return None
+    try:
+        with open(os.path.join(ARTICLE_CACHE_DIR, meta["f"]), "r", encoding="utf-8") as f:
+            text = f.read()
+    except Exception:
+        index["entries"].pop(key, None)
+        return None
+    meta["atime"] = time.time()
+    return text
+
+
+def article_cache_put(index: dict, key: str, text: str) -> None:
+    name = sha(key) + ".txt"
+    atomic_write_text(os.path.join(ARTICLE_CACHE_DIR, name), text)
+    index["entries"][key] = {"f": name, "size": len(text.encode("utf-8")) + len(key), "atime": time.time()}
+
+
+def article_cache_evict(index: dict, max_bytes: int = ENRICH_CACHE_MAX_BYTES) -> int:
+    entries = index["entries"]
+    total = sum(int(m.get("size", 0)) for m in entries.values())
+    removed = 0
+    for key, meta in sorted(entries.items(), key=lambda x: x[1].get("atime", 0)):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(ARTICLE_CACHE_DIR, meta["f"]))
+        except OSError:
+            pass
+        total -= int(meta.get("size", 0))
+        del entries[key]
+        removed += 1
+    return removed
+
+
+def _fetch_article_text(url: str, deadline: float, budget: dict) -> Optional[str]:
+    # None = sin intento (presupuesto agotado / error transitorio), se reintenta en otra corrida
+    remaining = deadline - time.time()
+    if remaining <= 0 or budget["bytes"] <= 0:
+        return None
+
+    headers = {"User-Agent": "Mozilla/5.0 (PulsoElectoral/1.0)"}
+    try:
+        with requests.get(url, headers=headers, timeout=min(15.0, remaining), stream=True) as r:
+            if r.status_code >= 500 or r.status_code in TRANSIENT_STATUS:
+                return None
+            ctype = r.headers.get("Content-Type", "text/html")
+            if r.status_code != 200 or "html" not in ctype:
+                return ""
+            m = CHARSET_RE.search(ctype)
+            encoding = m.group(1) if m else "utf-8"
+            chunks, size = [], 0
+            for chunk in r.iter_content(chunk_size=16384):
+                with budget["lock"]:
+                    if budget["bytes"] <= 0:
+                        return None
+                    budget["bytes"] -= len(chunk)
+                if time.time() >= deadline:
+                    return None
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= ENRICH_MAX_ARTICLE_BYTES:
+                    break
+    except Exception:
+        return None
+
+    return extract_main_text(b"".join(chunks), encoding=encoding)
+
+
+def fetch_article_texts(links: List[str]) -> Dict[str, str]:
+    if not ENABLE_ENRICH or not links:
+        return {}
+
+    os.makedirs(ARTICLE_CACHE_DIR, exist_ok=True)
+    index = load_json(ARTICLE_CACHE_INDEX, default={"entries": {}})
+    index.setdefault("entries", {})
+
+    out: Dict[str, str] = {}
+    todo: List[str] = []
+    for link in links:
+        key = canonical_url(link)
+        if key in out or key in todo:
+            continue
+        text = article_cache_get(index, key)
+        if text is None:
+            todo.append(key)
+        else:
+            out[key] = text
+    hits = len(out)
+
+    deadline = time.time() + ENRICH_TIME_BUDGET
+    budget = {"bytes": ENRICH_BYTE_BUDGET, "lock": threading.Lock()}
+    pool = ThreadPoolExecutor(max_workers=max(1, ENRICH_CONCURRENCY))
+    try:
+        futures = {pool.submit(_fetch_article_text, key, deadline, budget): key for key in todo}
+        done, _ = wait(futures, timeout=max(0.0, deadline - time.time()))
+        for f in done:
+            text = f.result()
+            if text is None:
+                continue
+            key = futures[f]
+            article_cache_put(index, key, text)
+            out[key] = text
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    evicted = article_cache_evict(index)
+    save_json(ARTICLE_CACHE_INDEX, index)
+    used = ENRICH_BYTE_BUDGET - max(0, budget["bytes"])
+    print(f"Enriquecimiento: {hits} desde cache, {len(out) - hits}/{len(todo)} descargados, {used} bytes, {evicted} expulsados")
+    return out
+
+
+# =========================
+# RESOLUCIÓN DE URLs (Google News -> medio) + cache LRU con TTL
+# =========================
+GNEWS_HOST = "news.google.com"
+META_REFRESH_RE = re.compile(r"url\s*=\s*['\"]?([^'\" >]+)", re.IGNORECASE)
+
+
+def is_google_news_redirect(url: str) -> bool:
+    u = urlparse(url or "")
+    return u.netloc.lower() == GNEWS_HOST and "/articles/" in u.path
+
+
+def _is_external(url: str) -> bool:
+    host = urlparse(url or "").netloc.lower()
+    return bool(host) and not (host == "google.com" or host.endswith(".google.com") or host.endswith(".gstatic.com"))
+
+
+def _resolve_redirect(url: str, deadline: float) -> Optional[str]:
+    headers = {"User-Agent": "Mozilla/5.0 (PulsoElectoral/1.0)"}
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        return None
+    try:
+        # 1) redirect HTTP clásico: basta un HEAD
+        r = requests.head(url, headers=headers, allow_redirects=True, timeout=min(8.0, remaining))
+        if _is_external(r.url):
+            return canonical_url(r.url)
+
+        # 2) página intermedia: se busca el destino en el HTML
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+        r = requests.get(url, headers=headers, allow_redirects=True, timeout=min(8.0, remaining))
+        if _is_external(r.url):
+            return canonical_url(r.url)
+        doc = lxml_html.fromstring(r.content)
+    except Exception:
+        return None
+
+    found = doc.xpath("//*[@data-n-au]/@data-n-au") + doc.xpath("//link[@rel='canonical']/@href")
+    for content in doc.xpath("//meta[translate(@http-equiv, 'REFRESH', 'refresh')='refresh']/@content"):
+        m = META_REFRESH_RE.search(content)
+        if m:
+            found.append(m.group(1))
+    for target in found:
+        if _is_external(target):
+            return canonical_url(target)
+    return None
+
+
+def is_unresolved(link: str, resolved: Dict[str, str]) -> bool:
+    # sin URL del medio no hay huella estable: el ítem se pospone (no se cuenta ni se marca visto)
+    return is_google_news_redirect(link) and link not in resolved
+
+
+def resolve_links(links: List[str], retry_at: Optional[Dict[str, float]] = None) -> Dict[str, str]:
+    # devuelve {link redirect: URL canónica}; lo no resuelto simplemente no aparece
+    # retry_at (opcional) recibe, para cada link no resuelto, desde cuándo vale la pena reintentarlo
+    redirects = []
+    for link in links:
+        if is_google_news_redirect(link) and link not in redirects:
+            redirects.append(link)
+    if not redirects:
+        return {}
+
+    cache = load_json(URL_CACHE_PATH, default={"entries": {}})
+    entries = cache.setdefault("entries", {})
+    now = time.time()
+
+    out: Dict[str, str] = {}
+    todo: List[str] = []
+    for link in redirects:
+        hit = entries.get(link)
+        ttl = URL_RESOLVE_TTL if hit and hit.get("url") else URL_RESOLVE_FAIL_TTL
+        if hit and now - float(hit.get("ts", 0)) < ttl:
+            hit["atime"] = now
+            if hit.get("url"):
+                out[link] = hit["url"]
+            elif retry_at is not None:
+                retry_at[link] = float(hit.get("ts", 0)) + URL_RESOLVE_FAIL_TTL
+        elif len(todo) < URL_RESOLVE_MAX_PER_RUN:
+            todo.append(link)
+    hits = len(out)
+    if not todo:
+        # todo salió del cache: no se reescribe el archivo (solo cambiaría atime)
+        return out
+
+    deadline = now + URL_RESOLVE_TIME_BUDGET
+    pool = ThreadPoolExecutor(max_workers=max(1, URL_RESOLVE_CONCURRENCY))
+    try:
+        futures = {pool.submit(_resolve_redirect, link, deadline): link for link in todo}
+        done, _ = wait(futures, timeout=max(0.0, deadline - time.time()))
+        for f in done:
+            link, target = futures[f], f.result()
+            entries[link] = {"url": target, "ts": time.time(), "atime": time.time()}
+            if target:
+                out[link] = target
+            elif retry_at is not None:
+                retry_at[link] = time.time() + URL_RESOLVE_FAIL_TTL
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    # LRU por cantidad de entradas
+    if len(entries) > URL_RESOLVE_CACHE_MAX:
+        keep = sorted(entries.items(), key=lambda x: x[1].get("atime", 0), reverse=True)[:URL_RESOLVE_CACHE_MAX]
+        cache["entries"] = dict(keep)
+    save_json(URL_CACHE_PATH, cache)
+
+    print(f"URLs: {len(redirects)} redirects, {hits} desde cache, {len(out) - hits}/{len(todo)} resueltos")
+    return out
+
+
 # =========================
 # MUNICIPIOS (Wikipedia) + cache
 # =========================
@@ -375,6 +1040,65 @@ def fetch_google_trends_signals():
     return signals
 
 
+# =========================
+# Heavy hitters por región (memoria acotada)
+# =========================
+def hh_new(top_k: int = HH_TOP_K, epsilon: float = HH_EPSILON, delta: float = HH_DELTA) -> dict:
+    # Count-Min Sketch (width x depth) + top-k de candidatos: memoria fija sin importar el vocabulario
+    width = max(1, int(math.ceil(math.e / epsilon)))
+    depth = max(1, int(math.ceil(math.log(1.0 / delta))))
+    return {
+        "width": width,
+        "depth": depth,
+        "k": top_k,
+        "rows": [[0] * width for _ in range(depth)],
+        "top": {},
+        "total": 0,
+    }
+
+
+def _hh_cells(hh: dict, key: str) -> List[int]:
+    # doble hashing (h1 + i*h2): una sola digest por clave
+    digest = hashlib.blake2b((key or "").encode("utf-8"), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % hh["width"] for i in range(hh["depth"])]
+
+
+def hh_add(hh: dict, key: str, n: int = 1) -> None:
+    cells = _hh_cells(hh, key)
+    for row, c in zip(hh["rows"], cells):
+        row[c] += n
+    hh["total"] += n
+    est = min(row[c] for row, c in zip(hh["rows"], cells))
+
+    top = hh["top"]
+    if key in top or len(top) < hh["k"]:
+        top[key] = est
+        return
+
+    # reemplazo estilo Space-Saving: sale el candidato más débil si el nuevo lo supera
+    weakest = min(top, key=top.get)
+    if est > top[weakest]:
+        del top[weakest]
+        top[key] = est
+
+
+def hh_copy(hh: dict) -> dict:
+    return dict(hh, rows=[row[:] for row in hh["rows"]], top=dict(hh["top"]))
+
+
+def hh_top(hh: dict) -> Dict[str, int]:
+    return dict(sorted(hh["top"].items(), key=lambda x: x[1], reverse=True))
+
+
+def trim_top(m: Dict[str, int], k: int = HH_TOP_K) -> Dict[str, int]:
+    # compacta mapas heredados (history previo sin límite)
+    if not m or len(m) <= k:
+        return m or {}
+    return dict(sorted(m.items(), key=lambda x: x[1], reverse=True)[:k])
+
+
 # =========================
 # Picos por región (baseline propio)
 # =========================
@@ -399,8 +1123,12 @@ def compute_spikes_region(
         if not m:
             continue
         used += 1
-        for k, v in m.items():
-            avg[k] = avg.get(k, 0.0) + float(v)
+        # mapa recortado a top-k (hashtag/keyword): una clave ausente puede valer hasta el piso del top-k
+        # (category / place se guardan completos: ahí ausente = 0)
+        trimmed = key in ("hashtag", "keyword") and len(m) >= HH_TOP_K
+        floor = float(min(m.values())) if trimmed else 0.0
+        for k in (current_map or {}):
+            avg[k] = avg.get(k, 0.0) + float(m.get(k, floor))
 
     if used == 0:
         return []
@@ -436,7 +1164,7 @@ def make_alert_signature(
     spikes_hash: List[Tuple[str, int, float]],
     top_place: List[Tuple[str, int]],
     top_cat: List[Tuple[str, int]],
-    evidence_links: List[str]
+    item_fps: List[str]
 ) -> str:
     core = {
         "r": region_key,
@@ -445,7 +1173,7 @@ def make_alert_signature(
         "sh": [x[0] for x in spikes_hash[:3]],
         "tp": [x[0] for x in top_place[:3]],
         "tc": [x[0] for x in top_cat[:3]],
-        "ev": evidence_links[:5],
+        "ev": sorted(item_fps),  # huellas de los items nuevos: un evento nuevo cambia la firma
     }
     return sha(json.dumps(core, ensure_ascii=False, sort_keys=True))
 
@@ -456,13 +1184,15 @@ def should_skip_repeated_alert(region_key: str, signature: str, ttl_seconds: int
     last_sig = reg.get("sig")
     last_ts = float(reg.get("ts", 0))
 
-    if last_sig == signature and (time.time() - last_ts) < ttl_seconds:
-        return True
+    return last_sig == signature and (time.time() - last_ts) < ttl_seconds
+
 
+def remember_alert(region_key: str, signature: str) -> None:
+    # se registra solo después de entregar, para que un envío fallido se reintente
+    state = load_json(LAST_ALERT_PATH, default={"regions": {}})
     state.setdefault("regions", {})
     state["regions"][region_key] = {"sig": signature, "ts": time.time()}
     save_json(LAST_ALERT_PATH, state)
-    return False
 
 
 # =========================
@@ -559,88 +1289,576 @@ def build_executive_alert(
 
 
 # =========================
-# CORE
+# CHECKPOINTS (corridas reanudables)
 # =========================
-def main():
+# etapas: fetched (candidatos) -> matched (texto enriquecido) -> aggregated (snapshot + trends) -> sent
+# seen / marks / history solo avanzan cuando la entrega terminó
+# los envíos hechos van a SENT_LOG_PATH (una línea por envío), no al checkpoint, que pesa varios MB
+
+
+def new_checkpoint(now: datetime) -> dict:
+    return {"run_id": now.isoformat(), "mode": MODE, "started": time.time(), "attempts": 1, "stage": "new", "sent": []}
+
+
+def load_checkpoint() -> Optional[dict]:
+    cp = load_json(CHECKPOINT_PATH, default=None)
+    if not cp:
+        return None
+
+    age = time.time() - float(cp.get("started", 0))
+    if cp.get("mode") != MODE or age > CHECKPOINT_TTL or int(cp.get("attempts", 0)) >= CHECKPOINT_MAX_ATTEMPTS:
+        print(f"Checkpoint descartado: corrida {cp.get('run_id')} (etapa {cp.get('stage')}, intentos {cp.get('attempts')})")
+        clear_checkpoint()
+        return None
+
+    cp["attempts"] = int(cp.get("attempts", 0)) + 1
+    save_checkpoint(cp)
+    cp["sent"] = read_sent_log(cp["run_id"])
+    print(f"Reanudando corrida {cp['run_id']} desde etapa '{cp['stage']}' (intento {cp['attempts']})")
+    return cp
+
+
+def save_checkpoint(cp: dict, stage: Optional[str] = None) -> None:
+    if stage:
+        cp["stage"] = stage
+    save_json(CHECKPOINT_PATH, {k: v for k, v in cp.items() if k != "sent"})
+
+
+def clear_checkpoint() -> None:
+    for path in (CHECKPOINT_PATH, SENT_LOG_PATH):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def read_sent_log(run_id: str) -> List[str]:
+    keys: List[str] = []
+    try:
+        with open(SENT_LOG_PATH, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # última línea cortada por una caída
+                if isinstance(rec, dict) and rec.get("run") == run_id:
+                    keys.append(rec.get("key"))
+    except OSError:
+        pass
+    return keys
+
+
+def append_sent_log(run_id: str, key: str) -> None:
+    with open(SENT_LOG_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"run": run_id, "key": key}, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def send_once(progress: Optional[dict], key: str, chat_id: str, text: str) -> None:
+    # con checkpoint: cada envío se registra y no se repite al reanudar
+    if progress is not None and key in progress.get("sent", []):
+        return
+    send_telegram(chat_id, text)
+    if progress is not None:
+        progress.setdefault("sent", []).append(key)
+        append_sent_log(progress["run_id"], key)
+
+
+# =========================
+# SUSCRIPTORES (fan-out con índice invertido)
+# =========================
+# data/subscribers.json:
+# {"subscribers": [{"id": "cliente-1", "chat_id": "...", "regions": ["la guajira"], "places": ["riohacha", "maicao"],
+#                   "categories": ["salud", "infra_vial"], "min_intensity": "MEDIA"}]}
+# lista vacía u omitida = comodín (todas)
+ANY = "*"
+INTENSITY_RANK = {"MEDIA": 1, "ALTA": 2}
+TELEGRAM_MAX_CHARS = 3900
+BATCH_SEPARATOR = "\n\n— — —\n\n"
+
+
+def resolve_region_key(name: str) -> Optional[str]:
+    n = normalize(name)
+    if n in REGIONS:
+        return n
+    for rk, info in REGIONS.items():
+        if n in [normalize(a) for a in info.get("aliases", [])] or n == normalize(info["label"]):
+            return rk
+    return None
+
+
+def load_subscribers(path: str = SUBSCRIBERS_PATH) -> Dict[str, dict]:
+    raw = load_json(path, default={"subscribers": []})
+    subs: Dict[str, dict] = {}
+    for i, s in enumerate(raw.get("subscribers", [])):
+        if not isinstance(s, dict) or not s.get("chat_id"):
+            continue
+        regions = [resolve_region_key(r) for r in s.get("regions") or []]
+        if any(r is None for r in regions):
+            print(f"Suscriptor {s.get('id', i)}: región desconocida en {s.get('regions')}, se omite")
+            continue
+        subs[str(s.get("id") or i)] = {
+            "chat_id": str(s["chat_id"]).strip(),
+            "regions": sorted(set(regions)) or [ANY],
+            "places": sorted({normalize(p) for p in s.get("places") or []}) or [ANY],
+            "categories": sorted({normalize(c) for c in s.get("categories") or []}) or [ANY],
+            "min_rank": INTENSITY_RANK.get(str(s.get("min_intensity", "MEDIA")).strip().upper(), 1),
+        }
+    return subs
+
+
+def build_subscriber_index(subs: Dict[str, dict]) -> Dict[Tuple[str, str, str], List[str]]:
+    # (región, lugar, categoría) -> suscriptores; "*" como comodín en cualquier posición
+    index: Dict[Tuple[str, str, str], List[str]] = {}
+    for sid, s in subs.items():
+        for r in s["regions"]:
+            for p in s["places"]:
+                for c in s["categories"]:
+                    index.setdefault((r, p, c), []).append(sid)
+    return index
+
+
+_SUB_CACHE: dict = {"key": None, "subs": {}, "index": {}}
+
+
+def load_subscriber_index() -> Tuple[Dict[str, dict], Dict[Tuple[str, str, str], List[str]]]:
+    # el índice se construye una vez y solo se rehace si cambia subscribers.json (mtime / tamaño)
+    try:
+        st = os.stat(SUBSCRIBERS_PATH)
+        key = (SUBSCRIBERS_PATH, st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = (SUBSCRIBERS_PATH, None, None)
+    if _SUB_CACHE["key"] != key:
+        subs = load_subscribers(SUBSCRIBERS_PATH)
+        _SUB_CACHE.update({"key": key, "subs": subs, "index": build_subscriber_index(subs)})
+        print(f"Suscriptores: {len(subs)} cargados")
+    return _SUB_CACHE["subs"], _SUB_CACHE["index"]
+
+
+def match_subscribers(
+    index: Dict[Tuple[str, str, str], List[str]],
+    subs: Dict[str, dict],
+    region_key: str,
+    places: Iterable[str],
+    categories: Iterable[str],
+    lvl: str,
+) -> List[str]:
+    # se llama por item con sus propios lugares / categorías (no el agregado de la región):
+    # costo ~ |lugares| x |categorías| consultas + suscriptores que calzan (no el total de suscriptores)
+    place_keys = list(places) + [ANY]
+    cat_keys = list(categories) + [ANY]
+    rank = INTENSITY_RANK.get(lvl, 1)
+
+    hit = set()
+    for r in (region_key, ANY):
+        for p in place_keys:
+            for c in cat_keys:
+                for sid in index.get((r, p, c), ()):
+                    if sid not in hit and subs[sid]["min_rank"] <= rank:
+                        hit.add(sid)
+    return sorted(hit)
+
+
+def flush_outbox(outbox: Dict[str, List[str]], progress: Optional[dict] = None) -> None:
+    # un envío por chat: se agrupan los mensajes hasta el límite de Telegram;
+    # lo que falla queda en OUTBOX_RETRY_PATH y se reintenta antes que lo nuevo en la próxima entrega
+    pending = load_json(OUTBOX_RETRY_PATH, default={"chats": {}})
+    cutoff = time.time() - OUTBOX_RETRY_TTL
+    retry = {c: p for c, p in pending.get("chats", {}).items() if float(p.get("ts", 0)) >= cutoff}
+    failed: Dict[str, dict] = {}
+
+    merged: Dict[str, List[str]] = {c: list(p.get("messages", [])) for c, p in retry.items()}
+    for chat_id, messages in outbox.items():
+        msgs = merged.setdefault(chat_id, [])
+        msgs += [m for m in messages if m not in msgs]
+
+    for chat_id, messages in merged.items():
+        chunks: List[str] = []
+        for m in messages:
+            if chunks and len(chunks[-1]) + len(BATCH_SEPARATOR) + len(m) <= TELEGRAM_MAX_CHARS:
+                chunks[-1] += BATCH_SEPARATOR + m
+            else:
+                chunks.append(m)
+        for i, chunk in enumerate(chunks):
+            try:
+                # clave por contenido: los reintentos mezclados no corren los índices al reanudar
+                send_once(progress, f"sub:{chat_id}:{sha(chunk)[:16]}", chat_id, chunk)
+            except requests.RequestException as ex:
+                # un chat caído (bloqueo, id inválido) no frena al resto de suscriptores
+                print(f"Suscriptor chat {chat_id}: envío fallido ({ex}), queda para reintento")
+                ts = retry.get(chat_id, {}).get("ts", time.time())
+                failed[chat_id] = {"ts": ts, "messages": chunks[i:]}
+                break
+
+    if failed or pending.get("chats"):
+        save_json(OUTBOX_RETRY_PATH, {"chats": failed})
+
+
+# =========================
+# INGESTA PUSH (spool + HTTP, micro-batching)
+# =========================
+def parse_push_body(body: bytes) -> List[dict]:
+    text = (body or b"").decode("utf-8", errors="replace").strip()
+    if not text:
+        return []
+    try:
+        obj = json.loads(text)
+        items = obj if isinstance(obj, list) else [obj]
+    except json.JSONDecodeError:
+        # JSONL: un item por línea
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [it for it in items if isinstance(it, dict)]
+
+
+DEFERRED_SPOOL_RE = re.compile(r"^deferred-(\d+)-\d+\.jsonl$")
+
+
+def read_inbox(inbox_dir: str = INBOX_DIR) -> Tuple[List[dict], List[str]]:
+    # los archivos se borran con ack_inbox() una vez que su contenido quedó a salvo (checkpoint / seen)
+    if not os.path.isdir(inbox_dir):
+        return [], []
+
+    items: List[dict] = []
+    paths: List[str] = []
+    now = time.time()
+    for name in sorted(os.listdir(inbox_dir)):
+        if name.startswith(".") or not name.endswith(".jsonl"):  # .tmp-*: escritura en curso
+            continue
+        m = DEFERRED_SPOOL_RE.match(name)
+        if m and float(m.group(1)) > now:
+            continue
+        path = os.path.join(inbox_dir, name)
+        try:
+            with open(path, "rb") as f:
+                items += parse_push_body(f.read())
+        except ValueError as ex:
+            print(f"PUSH: archivo inválido {name}: {ex}")
+            os.replace(path, path + ".bad")
+            continue
+        except OSError:
+            continue
+        paths.append(path)
+    return items, paths
+
+
+def ack_inbox(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def spool_items(items: List[dict], prefix: str = "http", not_before: Optional[float] = None) -> None:
+    # not_before: read_inbox ignora el archivo hasta esa hora (ítems pospuestos)
+    os.makedirs(INBOX_DIR, exist_ok=True)
+    name = f"{prefix}-{time.time_ns()}.jsonl" if not_before is None else f"{prefix}-{int(not_before)}-{time.time_ns()}.jsonl"
+    path = os.path.join(INBOX_DIR, name)
+    atomic_write_text(path, "".join(json.dumps(it, ensure_ascii=False) + "\n" for it in items))
+
+
+def collect_push_candidates(raw_items: List[dict], seen, queued, municipios_by_region, region_aliases_flat) -> List[dict]:
+    retry_at: Dict[str, float] = {}
+    resolved = resolve_links([str(raw.get("link") or "") for raw in raw_items], retry_at)
+    candidates = []
+    deferred = []
+    now = time.time()
+    for raw in raw_items:
+        title = str(raw.get("title") or "")
+        link = str(raw.get("link") or "")
+        if is_unresolved(link, resolved):
+            # vuelve al spool y se reintenta en el próximo lote
+            since = float(raw.get("deferred_since") or now)
+            if now - since < URL_RESOLVE_DEFER_MAX:
+                deferred.append(dict(raw, deferred_since=since))
+            continue
+        link = resolved.get(link, link)
+        summary = str(raw.get("summary") or "")
+        if not title and not link:
+            continue
+        source = normalize(str(raw.get("source") or "")) or "externo"
+        cand = make_candidate(title, link, summary, f"push:{source}", seen, queued, municipios_by_region, region_aliases_flat)
+        if cand:
+            candidates.append(cand)
+
+    if deferred:
+        # se reintentan cuando vence el fallo en cache (o en el próximo lote si no alcanzó a intentarse)
+        due = min(retry_at.get(str(raw.get("link") or ""), now) for raw in deferred)
+        print(f"PUSH: {len(deferred)} ítems pospuestos (redirect sin resolver) hasta {datetime.fromtimestamp(due, timezone.utc):%H:%M} UTC")
+        spool_items(deferred, "deferred", not_before=due if due > now else None)
+    return candidates
+
+
+def make_push_handler(q: "queue.Queue[dict]"):
+    class PushHandler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, obj: dict):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/ingest":
+                return self._reply(404, {"error": "not found"})
+            if PUSH_TOKEN and self.headers.get("Authorization", "") != f"Bearer {PUSH_TOKEN}":
+                return self._reply(401, {"error": "unauthorized"})
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                return self._reply(400, {"error": "invalid Content-Length"})
+            if length < 0:
+                return self._reply(400, {"error": "invalid Content-Length"})
+            if length > PUSH_MAX_BODY:
+                return self._reply(413, {"error": "body too large"})
+            try:
+                items = parse_push_body(self.rfile.read(length))
+            except ValueError as ex:
+                return self._reply(400, {"error": str(ex)})
+            for it in items:
+                q.put(it)
+            return self._reply(202, {"accepted": len(items)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return PushHandler
+
+
+def drain_queue(q: "queue.Queue[dict]", max_wait: float, max_items: int) -> List[dict]:
+    # micro-batch: espera hasta max_wait por el primer item y junta lo que llegue en esa ventana
+    items: List[dict] = []
+    deadline = time.time() + max_wait
+    while len(items) < max_items:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        try:
+            items.append(q.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return items
+
+
+def process_push_batch(raw_items: List[dict], counts: dict, municipios_by_region, region_aliases_flat) -> dict:
+    # devuelve la ventana con el lote incorporado; si la entrega falla se propaga la excepción
+    # y la ventana recibida queda intacta (el lote sigue en el spool para reintentar)
     seen = load_json(SEEN_PATH, default={"items": {}})
+    candidates = collect_push_candidates(raw_items, seen, set(), municipios_by_region, region_aliases_flat)
+    print(f"PUSH: {len(raw_items)} recibidos, {len(candidates)} candidatos")
+    if not candidates:
+        return counts
+
     history = load_json(HIST_PATH, default={"runs": []})
+    counts = copy_counts(counts)
+    before = {rk: len(counts["items"][rk]) for rk in REGIONS}
+    classify_candidates(candidates, counts, seen, municipios_by_region)
+
+    # la ventana en curso se evalúa como "corrida actual" contra la línea base persistida;
+    # solo se alerta por lo que entró en este lote
+    new_items = {rk: counts["items"][rk][before[rk]:] for rk in REGIONS}
+    runs = history.get("runs", []) + [{"regions": snapshot_counts(counts)}]
+    send_region_alerts(counts, runs, trends={}, new_items=new_items)
+    # seen avanza después de entregar: si el envío falla, el lote se reprocesa desde el spool
+    save_json(SEEN_PATH, seen)
+    return counts
+
+
+def serve_push() -> None:
+    q: "queue.Queue[dict]" = queue.Queue()
+    if PUSH_PORT:
+        server = ThreadingHTTPServer((PUSH_HOST, PUSH_PORT), make_push_handler(q))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"PUSH: escuchando en http://{PUSH_HOST}:{PUSH_PORT}/ingest")
+    os.makedirs(INBOX_DIR, exist_ok=True)
+    print(f"PUSH: spool en {INBOX_DIR}/*.jsonl")
 
     municipios_by_region, _muni_to_region, region_aliases_flat = load_places_and_map()
+    load_subscriber_index()
+    counts = new_run_counts()
+    next_cycle = time.time() if PUSH_POLL_SECONDS > 0 else time.time() + PUSH_WINDOW_SECONDS
+
+    while True:
+        try:
+            # lo recibido por HTTP va primero al spool: si la entrega falla, se reintenta desde disco
+            received = drain_queue(q, PUSH_BATCH_SECONDS, PUSH_BATCH_MAX)
+            if received:
+                spool_items(received, "http")
+            batch, spool_paths = read_inbox()
+            if batch:
+                counts = process_push_batch(batch, counts, municipios_by_region, region_aliases_flat)
+                ack_inbox(spool_paths)
+
+            # cierre de ventana: polling RSS (si aplica) + snapshot en history con lo acumulado
+            if time.time() >= next_cycle:
+                run_cycle(counts=copy_counts(counts), poll=PUSH_POLL_SECONDS > 0)
+                counts = new_run_counts()
+                next_cycle = time.time() + (PUSH_POLL_SECONDS if PUSH_POLL_SECONDS > 0 else PUSH_WINDOW_SECONDS)
+        except Exception as ex:
+            print(f"PUSH: error procesando lote: {type(ex).__name__}: {ex}")
 
-    # keywords globales para conteo (no bloquea alerta, solo suma)
-    category_terms = [normalize(t) for terms in CATEGORIES.values() for t in terms]
-    keywords_global = category_terms + [normalize(k) for k in GOV_KEYWORDS]
 
-    now = datetime.now(timezone.utc)
-    now_iso = now.isoformat()
-    now_epoch = int(time.time())
+# =========================
+# CORE
+# =========================
+# keywords globales para conteo (no bloquea alerta, solo suma)
+KEYWORDS_GLOBAL = [normalize(t) for terms in CATEGORIES.values() for t in terms] + [normalize(k) for k in GOV_KEYWORDS]
 
+SOCIAL_TERMS = ["inundaciones", "sequía", "deslizamientos", "infraestructura vial", "salud", "educación", "corrupción", "inseguridad"]
+
+
+def new_run_counts() -> dict:
     # contadores por región
-    region_counts_category = {rk: {} for rk in REGIONS.keys()}
-    region_counts_place = {rk: {} for rk in REGIONS.keys()}
-    region_counts_hashtag = {rk: {} for rk in REGIONS.keys()}
-    region_counts_keyword = {rk: {} for rk in REGIONS.keys()}
-    region_items = {rk: [] for rk in REGIONS.keys()}  # evidencias (links/titles)
-
-    def bump(d: Dict[str, int], k: str, n: int = 1):
-        d[k] = d.get(k, 0) + n
-
-    def register(rk: str, hit_places: List[str], hit_cats: List[str], hit_hash: List[str], hit_kw: List[str], item: dict):
-        for c in hit_cats:
-            bump(region_counts_category[rk], c)
-        for p in hit_places:
-            bump(region_counts_place[rk], p)
-        for h in hit_hash:
-            bump(region_counts_hashtag[rk], h)
-        for kw in hit_kw:
-            bump(region_counts_keyword[rk], kw)
-        region_items[rk].append(item)
-
-    # ---------- 1) NOTICIAS ----------
-    for feed in NEWS_FEEDS:
-        for e in fetch_entries(feed)[:40]:
-            title = getattr(e, "title", "") or ""
-            link = getattr(e, "link", "") or ""
-            summary = getattr(e, "summary", "") or getattr(e, "description", "") or ""
+    return {
+        "category": {rk: {} for rk in REGIONS.keys()},
+        "place": {rk: {} for rk in REGIONS.keys()},
+        "hashtag": {rk: hh_new() for rk in REGIONS.keys()},  # heavy hitters (acotado)
+        "keyword": {rk: hh_new() for rk in REGIONS.keys()},  # heavy hitters (acotado)
+        "items": {rk: [] for rk in REGIONS.keys()},  # evidencias (links/titles)
+    }
 
-            fp = item_fingerprint(title, link)
-            if fp in seen["items"]:
-                continue
 
-            text = f"{title} {summary}"
-            text_n = normalize(text)
+def copy_counts(counts: dict) -> dict:
+    # copia de trabajo: un lote se clasifica aquí y reemplaza a la ventana solo si la entrega terminó
+    return {
+        "category": {rk: dict(m) for rk, m in counts["category"].items()},
+        "place": {rk: dict(m) for rk, m in counts["place"].items()},
+        "hashtag": {rk: hh_copy(hh) for rk, hh in counts["hashtag"].items()},
+        "keyword": {rk: hh_copy(hh) for rk, hh in counts["keyword"].items()},
+        "items": {rk: list(v) for rk, v in counts["items"].items()},
+    }
 
-            hit_regions = infer_regions_from_text(text_n, municipios_by_region, region_aliases_flat)
-            if not hit_regions:
-                continue
 
-            hit_cats = classify_categories(text)
-            if not hit_cats and not any(normalize(g) in text_n for g in GOV_KEYWORDS):
-                continue
+def bump(d: Dict[str, int], k: str, n: int = 1):
+    d[k] = d.get(k, 0) + n
+
+
+def register(counts: dict, rk: str, hit_places: List[str], hit_cats: List[str], hit_hash: List[str], hit_kw: List[str], item: dict):
+    for c in hit_cats:
+        bump(counts["category"][rk], c)
+    for p in hit_places:
+        bump(counts["place"][rk], p)
+    for h in hit_hash:
+        hh_add(counts["hashtag"][rk], h)
+    for kw in hit_kw:
+        hh_add(counts["keyword"][rk], kw)
+    counts["items"][rk].append(item)
+
+
+def entry_fields(e) -> Tuple[str, str, str]:
+    title = getattr(e, "title", "") or ""
+    link = getattr(e, "link", "") or ""
+    summary = getattr(e, "summary", "") or getattr(e, "description", "") or ""
+    return title, link, summary
+
+
+def make_candidate(
+    title: str,
+    link: str,
+    summary: str,
+    src: str,
+    seen: dict,
+    queued: set,
+    municipios_by_region: Dict[str, List[str]],
+    region_aliases_flat: List[str],
+    require_topic: bool = True,
+    rk_hint: Optional[str] = None,
+    term: Optional[str] = None,
+) -> Optional[dict]:
+    # candidato = pasa dedup + filtro de región (se clasifica después, con texto enriquecido si aplica)
+    fp = item_fingerprint(title, link)
+    if fp in seen["items"] or fp in queued:
+        return None
+
+    text_n = normalize(f"{title} {summary}")
+
+    hit_regions = infer_regions_from_text(text_n, municipios_by_region, region_aliases_flat)
+    if not hit_regions:
+        # fallback: si la query era de la región, asigna por hint
+        if rk_hint in REGIONS and rk_hint in text_n:
+            hit_regions = [rk_hint]
+        elif rk_hint == "la guajira" and "guajira" in text_n:
+            hit_regions = ["la guajira"]
+        else:
+            return None
+
+    queued.add(fp)
+    cand = {
+        "fp": fp, "title": title, "link": link, "summary": summary,
+        "src": src, "hit_regions": hit_regions, "require_topic": require_topic,
+    }
+    if term:
+        cand["term"] = term
+    return cand
+
+
+def process_candidate(cand: dict, counts: dict, seen: dict, municipios_by_region: Dict[str, List[str]]) -> None:
+    title, link = cand["title"], cand["link"]
+    # el cuerpo enriquecido es respaldo: categorías y lugares salen de título + resumen y solo si ahí no hay nada
+    # se buscan en el cuerpo (la coincidencia es por substring: un cuerpo largo mete categorías ajenas)
+    # hashtags/keywords siguen siempre sobre título + resumen
+    feed_text = f"{title} {cand['summary']}"
+    text = f"{feed_text} {cand.get('body', '')}"
+    text_n = normalize(text)
+    feed_text_n = normalize(feed_text)
+
+    hit_cats = classify_categories(feed_text)
+    if not hit_cats and cand.get("body"):
+        hit_cats = rank_categories(text)
+    if cand["require_topic"] and not hit_cats and not any(normalize(g) in text_n for g in GOV_KEYWORDS):
+        return
+
+    hit_hash = extract_hashtags(feed_text)
+    hit_kw = [k for k in KEYWORDS_GLOBAL if k in feed_text_n]
+
+    seen["items"][cand["fp"]] = {"ts": time.time(), "title": title, "link": link, "src": cand["src"]}
+
+    for rk in cand["hit_regions"]:
+        hit_places = extract_places_for_region(feed_text_n, rk, municipios_by_region)
+        if not hit_places and cand.get("body"):
+            hit_places = extract_places_for_region(text_n, rk, municipios_by_region)
+        if not hit_places:
+            hit_places = [rk]
+
+        item = {"fp": cand["fp"], "src": cand["src"], "title": title.strip(), "link": link.strip(), "places": hit_places[:6], "cats": hit_cats[:3]}
+        if cand.get("term"):
+            item["term"] = cand["term"]
+        register(counts, rk, hit_places, hit_cats[:3], hit_hash[:6], hit_kw[:30], item)
 
-            hit_hash = extract_hashtags(text)
-            hit_kw = [k for k in keywords_global if k in text_n]
 
-            seen["items"][fp] = {"ts": time.time(), "title": title, "link": link, "src": "news"}
+def enrich_candidates(candidates: List[dict]) -> None:
+    bodies = fetch_article_texts([c["link"] for c in candidates if c["link"]])
+    for cand in candidates:
+        cand["body"] = bodies.get(canonical_url(cand["link"]), "")
 
-            for rk in hit_regions:
-                hit_places = extract_places_for_region(text_n, rk, municipios_by_region)
-                if not hit_places:
-                    hit_places = [rk]
 
-                register(
-                    rk,
-                    hit_places,
-                    hit_cats[:3],
-                    hit_hash[:6],
-                    hit_kw[:30],
-                    {"src": "news", "title": title.strip(), "link": link.strip(), "places": hit_places[:6], "cats": hit_cats[:3]}
-                )
+def classify_candidates(candidates: List[dict], counts: dict, seen: dict, municipios_by_region: Dict[str, List[str]]) -> None:
+    # enriquecimiento (opcional) + clasificación
+    enrich_candidates(candidates)
+    for cand in candidates:
+        process_candidate(cand, counts, seen, municipios_by_region)
 
-    # ---------- 2) PROXY SOCIAL ----------
+
+def collect_news_candidates(seen, queued, health, marks, municipios_by_region, region_aliases_flat) -> List[dict]:
+    candidates = []
+    for feed in NEWS_FEEDS:
+        entries = fetch_entries(feed, health, limit=40)
+        fresh = take_new_entries(entries, marks.get(feed))
+        update_feed_mark(marks, feed, entries)
+        for e in fresh:
+            title, link, summary = entry_fields(e)
+            cand = make_candidate(title, link, summary, "news", seen, queued, municipios_by_region, region_aliases_flat)
+            if cand:
+                candidates.append(cand)
+    return candidates
+
+
+def collect_social_candidates(seen, queued, health, marks, municipios_by_region, region_aliases_flat) -> List[dict]:
     social_queries = []
     for rk in REGIONS.keys():
-        for term in ["inundaciones", "sequía", "deslizamientos", "infraestructura vial", "salud", "educación", "corrupción", "inseguridad"]:
+        for term in SOCIAL_TERMS:
             for platform, site in SOCIAL_SITES.items():
                 # IMPORTANTE: usar rk tal cual (incluye "la guajira")
                 q = f'{site} "{rk}" "{term}"'
@@ -648,158 +1866,187 @@ def main():
 
     social_queries = social_queries[:28]
 
+    fetched = []
     for platform, rk_hint, term_hint, query in social_queries:
         feed_url = google_news_rss_url(query)
-        for e in fetch_entries(feed_url)[:15]:
-            title = getattr(e, "title", "") or ""
-            link = getattr(e, "link", "") or ""
-            summary = getattr(e, "summary", "") or getattr(e, "description", "") or ""
-
-            fp = item_fingerprint(title, link)
-            if fp in seen["items"]:
+        entries = fetch_entries(feed_url, health, limit=15)
+        fresh = take_new_entries(entries, marks.get(feed_url))
+        fetched.append((platform, rk_hint, term_hint, feed_url, entries, fresh))
+
+    # links de Google News -> URL del medio (mismo artículo = misma huella entre queries y corridas)
+    resolved = resolve_links([entry_fields(e)[1] for f in fetched for e in f[5]])
+
+    candidates = []
+    deferred = 0
+    now = time.time()
+    for platform, rk_hint, term_hint, feed_url, entries, fresh in fetched:
+        pending = 0
+        for e in fresh:
+            title, link, summary = entry_fields(e)
+            if is_unresolved(link, resolved):
+                if now - (entry_epoch(e) or now) < URL_RESOLVE_DEFER_MAX:
+                    pending += 1
                 continue
+            link = resolved.get(link, link)
+            cand = make_candidate(
+                title, link, summary, f"social:{platform}", seen, queued, municipios_by_region, region_aliases_flat,
+                require_topic=False, rk_hint=rk_hint, term=term_hint,
+            )
+            if cand:
+                candidates.append(cand)
+        # con ítems pospuestos la marca no avanza: la próxima corrida los vuelve a leer (seen evita duplicar el resto)
+        if not pending:
+            update_feed_mark(marks, feed_url, entries)
+        deferred += pending
+
+    if deferred:
+        print(f"URLs: {deferred} ítems pospuestos (redirect sin resolver)")
+    return candidates
 
-            text = f"{title} {summary}"
-            text_n = normalize(text)
-
-            hit_regions = infer_regions_from_text(text_n, municipios_by_region, region_aliases_flat)
-            if not hit_regions:
-                # fallback: si la query era de la región, asigna por hint
-                if rk_hint in REGIONS and rk_hint in text_n:
-                    hit_regions = [rk_hint]
-                elif rk_hint == "la guajira" and "guajira" in text_n:
-                    hit_regions = ["la guajira"]
-                else:
-                    continue
-
-            hit_cats = classify_categories(text)
-            hit_hash = extract_hashtags(text)
-            hit_kw = [k for k in keywords_global if k in text_n]
-
-            seen["items"][fp] = {"ts": time.time(), "title": title, "link": link, "src": f"social:{platform}"}
-
-            for rk in hit_regions:
-                hit_places = extract_places_for_region(text_n, rk, municipios_by_region)
-                if not hit_places:
-                    hit_places = [rk]
-
-                register(
-                    rk,
-                    hit_places,
-                    hit_cats[:3],
-                    hit_hash[:6],
-                    hit_kw[:30],
-                    {"src": f"social:{platform}", "title": title.strip(), "link": link.strip(), "places": hit_places[:6], "cats": hit_cats[:3], "term": term_hint}
-                )
-
-    # ---------- Limpieza seen ----------
+
+def prune_seen(seen: dict) -> None:
     cutoff = time.time() - (7 * 24 * 3600)
     seen["items"] = {k: v for k, v in seen["items"].items() if v.get("ts", 0) >= cutoff}
-    save_json(SEEN_PATH, seen)
 
-    # ---------- Snapshot history (por región) ----------
+
+def snapshot_counts(counts: dict) -> dict:
     run_regions = {}
     for rk in REGIONS.keys():
         run_regions[rk] = {
-            "category": region_counts_category[rk],
-            "place": region_counts_place[rk],
-            "hashtag": region_counts_hashtag[rk],
-            "keyword": region_counts_keyword[rk],
+            "category": counts["category"][rk],
+            "place": counts["place"][rk],
+            "hashtag": hh_top(counts["hashtag"][rk]),
+            "keyword": hh_top(counts["keyword"][rk]),
         }
+    return run_regions
+
+
+def make_history_run(counts: dict, now: datetime) -> dict:
+    return {"ts_iso": now.isoformat(), "ts_epoch": int(now.timestamp()), "regions": snapshot_counts(counts)}
 
+
+def append_history_run(history: dict, run: dict) -> None:
     history.setdefault("runs", [])
-    history["runs"].append({"ts_iso": now_iso, "ts_epoch": now_epoch, "regions": run_regions})
+    for r in history["runs"]:
+        for reg in (r.get("regions") or {}).values():
+            for key in ("hashtag", "keyword"):
+                if key in reg:
+                    reg[key] = trim_top(reg[key])
+    history["runs"].append(run)
     history["runs"] = history["runs"][-400:]
-    save_json(HIST_PATH, history)
 
-    # ---------- Trends (opcional, global) ----------
-    trends = fetch_google_trends_signals()
 
-    # =========================
-    # DAILY (por región)
-    # =========================
-    if MODE == "DAILY":
-        # Ventana 24h en epoch (si no hay epoch, cae en iso)
-        since = now_epoch - 24 * 3600
-        last_runs = []
-        for r in history.get("runs", []):
-            te = r.get("ts_epoch")
-            if isinstance(te, (int, float)) and te >= since:
-                last_runs.append(r)
-
-        if not last_runs:
-            print("DAILY: Sin data 24h.")
-            return
-
-        for rk, info in REGIONS.items():
-            agg_cat, agg_place, agg_hash = {}, {}, {}
-
-            for r in last_runs:
-                reg = (r.get("regions") or {}).get(rk) or {}
-                for k, v in (reg.get("category") or {}).items():
-                    agg_cat[k] = agg_cat.get(k, 0) + int(v)
-                for k, v in (reg.get("place") or {}).items():
-                    agg_place[k] = agg_place.get(k, 0) + int(v)
-                for k, v in (reg.get("hashtag") or {}).items():
-                    agg_hash[k] = agg_hash.get(k, 0) + int(v)
-
-            top_cat = sorted(agg_cat.items(), key=lambda x: x[1], reverse=True)[:8]
-            top_place = sorted(agg_place.items(), key=lambda x: x[1], reverse=True)[:8]
-            top_hash = sorted(agg_hash.items(), key=lambda x: x[1], reverse=True)[:8]
-
-            volume = sum(agg_cat.values()) + sum(agg_place.values()) + sum(agg_hash.values())
-            icon, lvl = compute_intensity_two_colors(score_spikes=0, volume=volume, top_muni_count=len(agg_place))
-
-            lines = []
-            lines.append(f"🟣 Pulso Electoral | Reporte Ejecutivo (24H) — {info['label']}")
-            lines.append(f"{icon} Intensidad agregada: {lvl}  |  Volumen 24H: {volume}\n")
-
-            lines.append("📈 Principales categorías (24H):")
-            if top_cat:
-                for k, v in top_cat:
-                    lines.append(f"- {human_category(k)}: {v}")
-            else:
-                lines.append("- Sin señales categorizadas.")
+def send_daily_reports(history: dict, trends: dict, now_epoch: int, progress: Optional[dict] = None) -> None:
+    # Ventana 24h en epoch (si no hay epoch, cae en iso)
+    since = now_epoch - 24 * 3600
+    last_runs = []
+    for r in history.get("runs", []):
+        te = r.get("ts_epoch")
+        if isinstance(te, (int, float)) and te >= since:
+            last_runs.append(r)
 
-            lines.append("\n🗺️ Territorios con mayor conversación (24H):")
-            if top_place:
-                for k, v in top_place:
-                    lines.append(f"- {k.title()}: {v}")
-            else:
-                lines.append("- Sin territorios destacados.")
+    if not last_runs:
+        print("DAILY: Sin data 24h.")
+        return
+
+    for rk, info in REGIONS.items():
+        agg_cat, agg_place, agg_hash = {}, {}, {}
+
+        for r in last_runs:
+            reg = (r.get("regions") or {}).get(rk) or {}
+            for k, v in (reg.get("category") or {}).items():
+                agg_cat[k] = agg_cat.get(k, 0) + int(v)
+            for k, v in (reg.get("place") or {}).items():
+                agg_place[k] = agg_place.get(k, 0) + int(v)
+            for k, v in (reg.get("hashtag") or {}).items():
+                agg_hash[k] = agg_hash.get(k, 0) + int(v)
+
+        top_cat = sorted(agg_cat.items(), key=lambda x: x[1], reverse=True)[:8]
+        top_place = sorted(agg_place.items(), key=lambda x: x[1], reverse=True)[:8]
+        top_hash = sorted(agg_hash.items(), key=lambda x: x[1], reverse=True)[:8]
+
+        volume = sum(agg_cat.values()) + sum(agg_place.values()) + sum(agg_hash.values())
+        icon, lvl = compute_intensity_two_colors(score_spikes=0, volume=volume, top_muni_count=len(agg_place))
+
+        lines = []
+        lines.append(f"🟣 Pulso Electoral | Reporte Ejecutivo (24H) — {info['label']}")
+        lines.append(f"{icon} Intensidad agregada: {lvl}  |  Volumen 24H: {volume}\n")
+
+        lines.append("📈 Principales categorías (24H):")
+        if top_cat:
+            for k, v in top_cat:
+                lines.append(f"- {human_category(k)}: {v}")
+        else:
+            lines.append("- Sin señales categorizadas.")
 
-            if top_hash:
-                lines.append("\n#️⃣ Marcadores (hashtags/palabras) (24H):")
-                for k, v in top_hash[:8]:
-                    lines.append(f"- {k}: {v}")
+        lines.append("\n🗺️ Territorios con mayor conversación (24H):")
+        if top_place:
+            for k, v in top_place:
+                lines.append(f"- {k.title()}: {v}")
+        else:
+            lines.append("- Sin territorios destacados.")
 
-            if trends.get("spikes"):
-                lines.append("\n🔎 Google Trends (CO) — señales en aceleración:")
-                for s in trends["spikes"][:5]:
-                    lines.append(f"- {s['term']}: {s['last']} (prom {s['avg']:.1f})")
+        if top_hash:
+            lines.append("\n#️⃣ Marcadores (hashtags/palabras) (24H):")
+            for k, v in top_hash[:8]:
+                lines.append(f"- {k}: {v}")
 
-            send_telegram(info["chat_id"], "\n".join(lines))
+        if trends.get("spikes"):
+            lines.append("\n🔎 Google Trends (CO) — señales en aceleración:")
+            for s in trends["spikes"][:5]:
+                lines.append(f"- {s['term']}: {s['last']} (prom {s['avg']:.1f})")
 
-            if CHAT_ID_PREMIUM:
-                premium = "\n".join(lines) + "\n\n🧾 Nota premium: Este reporte integra señales de prensa + proxy social y prioriza verificación de fuentes para mitigar ruido y desinformación."
-                send_telegram(CHAT_ID_PREMIUM, premium)
+        send_once(progress, f"daily:{rk}:region", info["chat_id"], "\n".join(lines))
 
-        return
+        if CHAT_ID_PREMIUM:
+            premium = "\n".join(lines) + "\n\n🧾 Nota premium: Este reporte integra señales de prensa + proxy social y prioriza verificación de fuentes para mitigar ruido y desinformación."
+            send_once(progress, f"daily:{rk}:premium", CHAT_ID_PREMIUM, premium)
+
+
+def format_evidence(items: List[dict], limit: int = 8) -> List[str]:
+    # evidencia al final (máx 8, lo más reciente primero)
+    if not items:
+        return []
+    lines = ["\n🧾 Evidencia (selección):"]
+    for it in list(reversed(items))[:limit]:
+        src = it.get("src", "fuente")
+        title = it.get("title", "").strip()
+        link = it.get("link", "").strip()
+        cats = ", ".join([human_category(c) for c in it.get("cats", [])]) if it.get("cats") else "sin clasificación"
+        places = ", ".join([p.title() for p in it.get("places", [])]) if it.get("places") else "sin territorio"
+        lines.append(f"• [{src}] {title}")
+        lines.append(f"  ({cats} | {places})")
+        if link:
+            lines.append(f"  {link}")
+    return lines
+
+
+def send_region_alerts(
+    counts: dict,
+    history_runs: List[dict],
+    trends: dict,
+    progress: Optional[dict] = None,
+    new_items: Optional[Dict[str, List[dict]]] = None,
+) -> None:
+    # history_runs debe incluir la corrida actual como último elemento (baseline = las 20 previas)
+    # new_items (PUSH): items que entraron en este lote por región; la ventana acumulada solo da contexto
+    subs, sub_index = load_subscriber_index()
+    outbox: Dict[str, List[str]] = {}
 
-    # =========================
-    # ALERT (por región)
-    # =========================
     for rk, info in REGIONS.items():
-        cats_now = region_counts_category[rk]
-        place_now = region_counts_place[rk]
-        hash_now = region_counts_hashtag[rk]
-        items_now = region_items[rk]
+        cats_now = counts["category"][rk]
+        place_now = counts["place"][rk]
+        hash_now = hh_top(counts["hashtag"][rk])
+        items_now = counts["items"][rk]
+        fresh = items_now if new_items is None else new_items.get(rk, [])
+        if new_items is not None and not fresh:
+            continue
 
-        volume = sum(cats_now.values()) + sum(place_now.values()) + sum(hash_now.values())
+        volume = sum(cats_now.values()) + sum(place_now.values()) + counts["hashtag"][rk]["total"]
 
-        spikes_cat = compute_spikes_region(cats_now, history.get("runs", []), rk, "category", min_count=2, factor=2.0)
-        spikes_place = compute_spikes_region(place_now, history.get("runs", []), rk, "place", min_count=2, factor=2.0)
-        spikes_hash = compute_spikes_region(hash_now, history.get("runs", []), rk, "hashtag", min_count=2, factor=2.0)
+        spikes_cat = compute_spikes_region(cats_now, history_runs, rk, "category", min_count=2, factor=2.0)
+        spikes_place = compute_spikes_region(place_now, history_runs, rk, "place", min_count=2, factor=2.0)
+        spikes_hash = compute_spikes_region(hash_now, history_runs, rk, "hashtag", min_count=2, factor=2.0)
 
         # score simple por número de spikes
         score_spikes = (1 if spikes_cat else 0) + (1 if spikes_place else 0) + (1 if spikes_hash else 0)
@@ -809,10 +2056,6 @@ def main():
         top_cat_now = sorted(cats_now.items(), key=lambda x: x[1], reverse=True)[:8]
         top_place_now = sorted(place_now.items(), key=lambda x: x[1], reverse=True)[:8]
 
-        # evidencia (máx 8 links)
-        evidence_links = [it.get("link", "") for it in items_now if it.get("link")]
-        evidence_links = [l for l in evidence_links if l][:8]
-
         # gatillo de alerta (por región)
         strong_signal = bool(spikes_cat or spikes_place or spikes_hash or len(items_now) >= 5 or volume >= 12 or trends.get("spikes"))
         if not strong_signal:
@@ -827,13 +2070,15 @@ def main():
             spikes_hash=spikes_hash,
             top_place=top_place_now,
             top_cat=top_cat_now,
-            evidence_links=evidence_links,
+            item_fps=[it["fp"] for it in fresh],
         )
-        if should_skip_repeated_alert(rk, signature, ttl_seconds=6 * 3600):
+        # si la corrida reanudada ya había empezado a entregar esta región, no es un repetido
+        resumed = bool(progress) and f"alert:{rk}:region" in progress.get("sent", [])
+        if not resumed and should_skip_repeated_alert(rk, signature, ttl_seconds=6 * 3600):
             continue
 
         # construye mensaje premium
-        lines = build_executive_alert(
+        header = build_executive_alert(
             region_label=info["label"],
             icon=icon,
             lvl=lvl,
@@ -844,30 +2089,121 @@ def main():
             spikes_place=spikes_place,
             items=items_now
         )
-
-        # evidencia al final (máx 8)
-        if items_now:
-            lines.append("\n🧾 Evidencia (selección):")
-            for it in items_now[:8]:
-                src = it.get("src", "fuente")
-                title = it.get("title", "").strip()
-                link = it.get("link", "").strip()
-                cats = ", ".join([human_category(c) for c in it.get("cats", [])]) if it.get("cats") else "sin clasificación"
-                places = ", ".join([p.title() for p in it.get("places", [])]) if it.get("places") else "sin territorio"
-                lines.append(f"• [{src}] {title}")
-                lines.append(f"  ({cats} | {places})")
-                if link:
-                    lines.append(f"  {link}")
+        lines = header + format_evidence(fresh)
 
         # envia SOLO a su región
-        send_telegram(info["chat_id"], "\n".join(lines))
+        send_once(progress, f"alert:{rk}:region", info["chat_id"], "\n".join(lines))
 
         # premium opcional
         if CHAT_ID_PREMIUM:
             premium_pack = "\n".join(lines) + "\n\n🧾 Nota premium: Este informe prioriza validación de fuentes y consistencia narrativa para reducir riesgo de amplificación de desinformación."
-            send_telegram(CHAT_ID_PREMIUM, premium_pack)
+            send_once(progress, f"alert:{rk}:premium", CHAT_ID_PREMIUM, premium_pack)
 
-    return
+        remember_alert(rk, signature)
+
+        # suscriptores: cada item se cruza con el índice por sus propios lugares x categorías;
+        # cada chat recibe la síntesis + solo los items que calzan con sus filtros
+        per_chat: Dict[str, List[dict]] = {}
+        for it in fresh:
+            for sid in match_subscribers(sub_index, subs, rk, it.get("places", []), it.get("cats", []), lvl):
+                chat_items = per_chat.setdefault(subs[sid]["chat_id"], [])
+                if not any(x is it for x in chat_items):
+                    chat_items.append(it)
+        for chat_id, chat_items in per_chat.items():
+            outbox.setdefault(chat_id, []).append("\n".join(header + format_evidence(chat_items)))
+
+    flush_outbox(outbox, progress)
+
+
+def run_cycle(counts: Optional[dict] = None, poll: bool = True) -> None:
+    seen = load_json(SEEN_PATH, default={"items": {}})
+    history = load_json(HIST_PATH, default={"runs": []})
+    health = load_json(HEALTH_PATH, default={"sources": {}})
+    marks = load_json(FEED_MARKS_PATH, default={})
+
+    municipios_by_region, _muni_to_region, region_aliases_flat = load_places_and_map()
+
+    # en PUSH la ventana acumulada vive en memoria: no hay checkpoint que reanudar
+    resumable = counts is None
+    cp = load_checkpoint() if resumable else None
+
+    if cp is None:
+        cp = new_checkpoint(datetime.now(timezone.utc))
+        queued = set()
+
+        candidates: List[dict] = []
+        if poll:
+            # ---------- 1) NOTICIAS ----------
+            candidates += collect_news_candidates(seen, queued, health, marks, municipios_by_region, region_aliases_flat)
+            # ---------- 2) PROXY SOCIAL ----------
+            candidates += collect_social_candidates(seen, queued, health, marks, municipios_by_region, region_aliases_flat)
+            report_source_health(health)
+
+        # ---------- 3) PUSH (spool data/inbox) ----------
+        spooled, spool_paths = read_inbox()
+        candidates += collect_push_candidates(spooled, seen, queued, municipios_by_region, region_aliases_flat)
+
+        # el spool se borra recién al final: si el checkpoint se descarta, la próxima corrida lo vuelve a leer
+        cp.update({"candidates": candidates, "marks": marks, "health": health, "spool": spool_paths})
+        if resumable:
+            save_checkpoint(cp, "fetched")
+    else:
+        marks, health = cp.get("marks", marks), cp.get("health", health)
+
+    now = datetime.fromisoformat(cp["run_id"])
+    candidates = cp["candidates"]
+    progress = cp if resumable else None
+
+    # ---------- Enriquecimiento (opcional) ----------
+    if cp["stage"] in ("new", "fetched"):
+        enrich_candidates(candidates)
+        if resumable:
+            save_checkpoint(cp, "matched")
+
+    # clasificación: determinística a partir de los candidatos, se recalcula al reanudar
+    counts = counts if counts is not None else new_run_counts()
+    before = {rk: len(counts["items"][rk]) for rk in REGIONS}
+    for cand in candidates:
+        process_candidate(cand, counts, seen, municipios_by_region)
+    # cierre de ventana PUSH: lo acumulado ya se alertó lote a lote; solo cuenta lo nuevo de este ciclo
+    new_items = None if resumable else {rk: counts["items"][rk][before[rk]:] for rk in REGIONS}
+
+    # ---------- Snapshot history (por región) + Trends (opcional, global) ----------
+    if cp["stage"] in ("new", "fetched", "matched"):
+        cp["run"] = make_history_run(counts, now)
+        cp["trends"] = fetch_google_trends_signals()
+        if resumable:
+            save_checkpoint(cp, "aggregated")
+    # history guarda el run_id aplicado: una caída entre guardar history y borrar el checkpoint no duplica la corrida
+    if history.get("last_run_id") != cp["run_id"]:
+        append_history_run(history, cp["run"])
+        history["last_run_id"] = cp["run_id"]
+    trends = cp["trends"]
+
+    # ---------- Entrega ----------
+    if MODE == "DAILY":
+        send_daily_reports(history, trends, int(now.timestamp()), progress)
+    else:
+        send_region_alerts(counts, history.get("runs", []), trends, progress, new_items=new_items)
+    if resumable:
+        save_checkpoint(cp, "sent")
+
+    # ---------- Estado: solo avanza tras entregar ----------
+    prune_seen(seen)
+    save_json(SEEN_PATH, seen)
+    save_json(FEED_MARKS_PATH, prune_feed_marks(marks))
+    if poll:
+        save_json(HEALTH_PATH, health)
+    save_json(HIST_PATH, history)
+    ack_inbox(cp.get("spool", []))
+    clear_checkpoint()
+
+
+def main():
+    if MODE == "PUSH":
+        serve_push()
+        return
+    run_cycle()
 
 
 if __name__ == "__main__":
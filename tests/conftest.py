@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# bot.py exige secrets al importar y crea data/ en el cwd: se importa desde un directorio temporal
+for _k in ("TELEGRAM_TOKEN", "CHAT_ID_ANTIOQUIA", "CHAT_ID_CALDAS", "CHAT_ID_GUAJIRA", "CHAT_ID_CESAR"):
+    os.environ.setdefault(_k, "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_cwd = os.getcwd()
+os.chdir(tempfile.mkdtemp())
+import bot  # noqa: E402,F401
+os.chdir(_cwd)
@@ -0,0 +1,102 @@
+import feedparser
+import pytest
+
+import bot
+
+
+RSS_ELTIEMPO = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel><title>Política - ELTIEMPO.COM</title><link>https://www.eltiempo.com/politica</link>
+<item>
+  <title>Gobernación de La Guajira firma contrato para el hospital de Maicao</title>
+  <link>https://www.eltiempo.com/politica/gobierno/hospital-maicao-123</link>
+  <description>La alcaldía de Riohacha y la gobernación anunciaron obras &amp; recursos.</description>
+  <pubDate>Mon, 19 Oct 2026 10:30:00 -0500</pubDate>
+</item>
+<item>
+  <title>Concejo de Manizales debate la vía al Magdalena</title>
+  <link>https://www.eltiempo.com/politica/congreso/via-manizales-456</link>
+  <description><![CDATA[Sesión sobre infraestructura vial en Caldas]]></description>
+  <pubDate>Mon, 19 Oct 2026 09:00:00 GMT</pubDate>
+</item>
+</channel></rss>
+"""
+
+RSS_SEMANA = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">
+<channel><title>Semana</title><link>https://www.semana.com</link>
+<atom:link href="https://www.semana.com/arc/outboundfeeds/rss/" rel="self" type="application/rss+xml"/>
+<item>
+  <title>Procuraduría abre investigación en Valledupar</title>
+  <link>https://www.semana.com/politica/articulo/procuraduria-valledupar/202601/</link>
+  <description>Cesar: denuncias por sobrecosto en convenio</description>
+  <pubDate>Sun, 18 Oct 2026 22:15:00 +0000</pubDate>
+</item>
+</channel></rss>
+"""
+
+RSS_GOOGLE_NEWS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel>
+<title>"la guajira" "salud" - Google Noticias</title><link>https://news.google.com/</link>
+<item>
+  <title>Crisis de salud en Riohacha - El Heraldo</title>
+  <link>https://news.google.com/rss/articles/CBMiQWh0dHBzOi8vd3d3LmVsaGVyYWxkby5jby9sYS1ndWFqaXJh?oc=5</link>
+  <guid isPermaLink="false">CBMiQWh0dHBzOi8vd3d3LmVsaGVyYWxkby5jby9sYS1ndWFqaXJh</guid>
+  <pubDate>Mon, 19 Oct 2026 11:00:00 GMT</pubDate>
+  <description>Crisis de salud en Riohacha El Heraldo</description>
+  <source url="https://www.elheraldo.co">El Heraldo</source>
+</item>
+</channel></rss>
+"""
+
+ATOM = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Atom</title>
+<entry>
+  <title>Paro en Cesar</title>
+  <link rel="self" href="https://example.co/self/1"/>
+  <link rel="alternate" href="https://example.co/paro-cesar"/>
+  <summary>Protesta en Valledupar</summary>
+  <published>2026-10-19T08:00:00-05:00</published>
+  <updated>2026-10-19T09:00:00Z</updated>
+</entry>
+</feed>
+"""
+
+FEEDS = [RSS_ELTIEMPO, RSS_SEMANA, RSS_GOOGLE_NEWS, ATOM]
+
+
+@pytest.mark.parametrize("raw", FEEDS, ids=["eltiempo", "semana", "google_news", "atom"])
+def test_stream_parser_matches_feedparser(raw):
+    content = raw.encode("utf-8")
+    ours = bot.stream_parse_feed(content)
+    ref = feedparser.parse(content).entries
+
+    assert len(ours) == len(ref) > 0
+    for a, b in zip(ours, ref):
+        assert bot.entry_fields(a) == bot.entry_fields(b)
+        assert a.published_parsed == b.get("published_parsed")
+        if "updated" in b:  # feedparser mapea updated_parsed -> published_parsed cuando falta (deprecado)
+            assert a.updated_parsed == b["updated_parsed"]
+        assert bot.entry_epoch(a) == bot.entry_epoch(b)
+
+
+def test_stream_parser_stops_at_limit():
+    assert len(bot.stream_parse_feed(RSS_ELTIEMPO.encode("utf-8"), limit=1)) == 1
+
+
+def test_non_feed_xml_is_a_failure():
+    xhtml = b'<?xml version="1.0"?><html xmlns="http://www.w3.org/1999/xhtml"><body><p>Consent</p></body></html>'
+    with pytest.raises(ValueError):
+        bot.parse_feed(xhtml)
+
+
+def test_unlisted_namespace_falls_back_to_feedparser():
+    raw = b'<rss xmlns="http://example.com/ns" version="2.0"><channel><item><title>A</title><link>http://a/1</link></item></channel></rss>'
+    entries = bot.parse_feed(raw)
+    assert [bot.entry_fields(e)[:2] for e in entries] == [("A", "http://a/1")]
+
+
+def test_malformed_feed_falls_back_to_feedparser():
+    raw = RSS_SEMANA.encode("utf-8") + b"<oops"
+    entries = bot.parse_feed(raw)
+    assert entries and entries[0].title == "Procuraduría abre investigación en Valledupar"
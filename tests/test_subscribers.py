@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+import bot
+
+
+def add_item(counts, fp, title, places, cats):
+    item = {"fp": fp, "src": "news", "title": title, "link": f"https://medio.co/{fp}", "places": places, "cats": cats}
+    bot.register(counts, "la guajira", places, cats, [], [], item)
+
+
+@pytest.fixture
+def delivery(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    monkeypatch.setattr(bot, "SUBSCRIBERS_PATH", str(tmp_path / "data" / "subscribers.json"))
+    sent = []
+    monkeypatch.setattr(bot, "send_telegram", lambda chat_id, text: sent.append((chat_id, text)))
+    return tmp_path, sent
+
+
+def write_subscribers(tmp_path, subs):
+    (tmp_path / "data" / "subscribers.json").write_text(json.dumps({"subscribers": subs}), encoding="utf-8")
+
+
+def test_subscribers_match_per_item_not_region_cross_product(delivery):
+    tmp_path, sent = delivery
+    write_subscribers(tmp_path, [
+        {"id": "a", "chat_id": "A", "regions": ["la guajira"], "places": ["riohacha"], "categories": ["salud"]},
+        {"id": "b", "chat_id": "B", "regions": ["la guajira"], "places": ["maicao"]},
+        # riohacha y medioambiente aparecen en la región, pero nunca en el mismo item
+        {"id": "c", "chat_id": "C", "regions": ["guajira"], "places": ["riohacha"], "categories": ["medioambiente"]},
+    ])
+    counts = bot.new_run_counts()
+    add_item(counts, "1", "Hospital de Riohacha sin urgencias", ["riohacha"], ["salud"])
+    add_item(counts, "2", "Contaminación del río en Maicao", ["maicao"], ["medioambiente"])
+    for i in range(4):
+        add_item(counts, f"x{i}", f"Colegio en Uribia {i}", ["uribia"], ["educacion"])
+
+    bot.send_region_alerts(counts, [{"regions": bot.snapshot_counts(counts)}], trends={})
+
+    by_chat = {chat_id: text for chat_id, text in sent}
+    assert "https://medio.co/1" in by_chat["A"] and "https://medio.co/2" not in by_chat["A"]
+    assert "https://medio.co/2" in by_chat["B"] and "https://medio.co/1" not in by_chat["B"]
+    assert "https://medio.co/x0" not in by_chat["A"] + by_chat["B"]
+    assert "C" not in by_chat
+
+
+def test_subscriber_index_is_rebuilt_only_when_file_changes(delivery, monkeypatch):
+    tmp_path, _ = delivery
+    write_subscribers(tmp_path, [{"id": "a", "chat_id": "A"}])
+    builds = []
+    real_build = bot.build_subscriber_index
+    monkeypatch.setattr(bot, "build_subscriber_index", lambda subs: builds.append(1) or real_build(subs))
+
+    subs, _ = bot.load_subscriber_index()
+    bot.load_subscriber_index()
+    assert list(subs) == ["a"] and len(builds) == 1
+
+    write_subscribers(tmp_path, [{"id": "a", "chat_id": "A"}, {"id": "b", "chat_id": "B"}])
+    subs, _ = bot.load_subscriber_index()
+    assert sorted(subs) == ["a", "b"] and len(builds) == 2